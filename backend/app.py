@@ -1,10 +1,18 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
 from flask_cors import CORS
+import orjson
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import os
+import socket
+import threading
+import time
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import errorcode
+from mysql.connector import pooling
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения
@@ -17,87 +25,372 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'notes_db'),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', ''),
-    'ssl_disabled': True  # Важно для Docker MySQL
+    'ssl_disabled': True,  # Важно для Docker MySQL
+    # Чистый Python-драйвер работает с gevent (см. wsgi.py); для синхронных
+    # воркеров DB_USE_PURE=false включает более быстрый C-extension
+    'use_pure': os.getenv('DB_USE_PURE', 'true').lower() == 'true',
+    'time_zone': '+00:00',  # Время в БД в UTC, как datetime.utcnow() в create_note
+    # Одиночные запросы фиксируются сразу, без отдельного COMMIT
+    'autocommit': True,
+    # Таймаут только на подключение и handshake: после него драйвер снимает
+    # таймаут с сокета, поэтому время выполнения запросов не ограничено
+    'connection_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5))
 }
 
+# Размер пула соединений (25 - оптимум для MySQL под нагрузкой)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 25))
+# Сколько секунд ждать свободное подключение, если пул исчерпан
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+
+# Кэш ответов: по умолчанию выключен (NullCache) - кэш внутри процесса
+# (SimpleCache) нельзя сбросить во всех воркерах gunicorn. Включается общим
+# кэшем: CACHE_TYPE=RedisCache + CACHE_REDIS_URL (см. docker-compose.yml)
+CACHE_CONFIG = {
+    'CACHE_TYPE': os.getenv('CACHE_TYPE', 'NullCache'),
+    'CACHE_DEFAULT_TIMEOUT': 30,
+    'CACHE_REDIS_URL': os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+}
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask на orjson: ответы и request.json (datetime без isoformat)"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
+cache = Cache(app, config=CACHE_CONFIG)
 
 # Настройка логирования
-logging.basicConfig(level=logging.INFO)
+# Уровень из LOG_LEVEL (по умолчанию WARNING - без логов на каждый запрос);
+# сообщения форматируются лениво, только если уровень включен
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING').upper())
 logger = logging.getLogger(__name__)
 
 # ========== ФУНКЦИИ ДЛЯ РАБОТЫ С БАЗОЙ ДАННЫХ ==========
 
+def create_pool():
+    """Создает пул соединений к MySQL в Docker"""
+    try:
+        pool = pooling.MySQLConnectionPool(
+            pool_name="notes",
+            pool_size=DB_POOL_SIZE,
+            # Без COM_RESET_CONNECTION при возврате в пул: autocommit включен,
+            # bulk сам закрывает транзакцию, а потоковая выдача дочитывает
+            # результат при закрытии ответа (call_on_close в stream_ndjson).
+            # Сброс сессии также вернул бы time_zone к глобальному значению
+            # сервера (поэтому в docker-compose и --default-time-zone=+00:00)
+            pool_reset_session=False,
+            **DB_CONFIG
+        )
+        logger.info("✅ Database pool (%d) connected to %s:%s", DB_POOL_SIZE, DB_CONFIG['host'], DB_CONFIG['port'])
+        return pool
+    except mysql.connector.Error as e:
+        logger.error("❌ Database pool error: %s", e)
+        logger.error("   Config: host=%s, port=%s", DB_CONFIG['host'], DB_CONFIG['port'])
+        return None
+
+# Пул создается лениво первым запросом: MySQLConnectionPool сразу открывает
+# все DB_POOL_SIZE подключений, и при импорте это тормозило бы старт воркера
+POOL = None
+# Под gevent threading.Lock пропатчен - защищает и от параллельных гринлетов
+_POOL_LOCK = threading.Lock()
+
+# Интервал TCP keepalive (сек): меньше типичных таймаутов простоя NAT/балансировщиков
+# (системное значение tcp_keepalive_time - 7200 секунд)
+DB_KEEPALIVE_INTERVAL = 60
+
+def enable_keepalive(conn):
+    """Включает TCP keepalive, чтобы простаивающие подключения не рвались по пути"""
+    # Сокет доступен только у чистого Python-драйвера (DB_USE_PURE=true)
+    sock = getattr(getattr(conn, '_socket', None), 'sock', None)
+    if sock is None:
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # Параметры проб есть не на всех платформах
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, DB_KEEPALIVE_INTERVAL)
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, DB_KEEPALIVE_INTERVAL)
+
 def get_db_connection():
-    """Создает подключение к MySQL в Docker"""
+    """Берет подключение из пула (close() возвращает его обратно в пул)"""
+    global POOL
+    if POOL is None:
+        with _POOL_LOCK:
+            if POOL is None:
+                POOL = create_pool()
+        if POOL is None:
+            return None
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            conn = POOL.get_connection()
+            # Пул мог переподключиться - сокет новый, включаем keepalive заново
+            enable_keepalive(conn)
+            return conn
+        except pooling.PoolError as e:
+            # Под gevent запросов больше, чем подключений - ждем освобождения
+            if time.monotonic() >= deadline:
+                logger.error("❌ Database pool exhausted: %s", e)
+                return None
+            time.sleep(0.01)
+        except mysql.connector.Error as e:
+            logger.error("❌ Database connection error: %s", e)
+            return None
+
+# Кэш статуса БД для / и /health (интервал проверки в секундах)
+DB_STATUS_TTL = 5
+_LAST_OK_TS = 0.0
+_LAST_STATUS = "unknown"
+
+def get_db_status():
+    """Возвращает статус БД, проверяя его не чаще раза в DB_STATUS_TTL секунд"""
+    global _LAST_OK_TS, _LAST_STATUS
+    if time.monotonic() - _LAST_OK_TS < DB_STATUS_TTL:
+        return _LAST_STATUS
+    
+    conn = get_db_connection()
+    if not conn:
+        _LAST_STATUS = "disconnected"
+        return _LAST_STATUS
+    
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        logger.info(f"✅ Database connected to {DB_CONFIG['host']}:{DB_CONFIG['port']}")
-        return conn
+        with conn:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+        _LAST_OK_TS = time.monotonic()
+        _LAST_STATUS = "connected"
     except mysql.connector.Error as e:
-        logger.error(f"❌ Database connection error: {e}")
-        logger.error(f"   Config: host={DB_CONFIG['host']}, port={DB_CONFIG['port']}")
+        logger.error("❌ Database ping error: %s", e)
+        _LAST_STATUS = "disconnected"
+    return _LAST_STATUS
+
+def parse_page_args(default_limit, max_limit):
+    """Читает limit/before/before_id из query string (ValueError при ошибке)"""
+    limit = request.args.get('limit')
+    before = request.args.get('before')
+    before_id = request.args.get('before_id')
+    
+    limit = int(limit) if limit else default_limit
+    if limit is not None and not 1 <= limit <= max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+    if before_id and not before:
+        raise ValueError("before_id requires before")
+    before = datetime.fromisoformat(before) if before else None
+    if before is not None and before.tzinfo is not None:
+        # Драйвер отбрасывает tzinfo, а в БД время в UTC - приводим сами
+        before = before.astimezone(timezone.utc).replace(tzinfo=None)
+    before_id = int(before_id) if before_id else None
+    return limit, before, before_id
+
+def get_next_cursor(rows, limit):
+    """Курсор следующей страницы или None, если страница последняя"""
+    if limit is None or len(rows) < limit:
         return None
+    last = rows[-1]
+    return {"before": last['created_at'], "before_id": last['id']}
+
+def wants_ndjson():
+    """Клиент просит потоковый NDJSON вместо одного JSON-объекта"""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def stream_ndjson(conn, sql, params=(), **extra):
+    """Выполняет запрос и отдает строки потоком NDJSON, не собирая их в памяти"""
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(sql, params)
+    except Exception:
+        cursor.close()
+        conn.close()
+        raise
+    
+    def generate():
+        for row in cursor:
+            row.update(extra)
+            yield orjson.dumps(row) + b'\n'
+    
+    def release():
+        # Клиент мог отключиться посреди потока (или это HEAD и генератор не
+        # запускался) - дочитываем результат, чтобы вернуть подключение в пул чистым
+        try:
+            conn.consume_results()
+            cursor.close()
+        finally:
+            conn.close()
+    
+    # Подключение освобождается при закрытии ответа, а не в генераторе:
+    # на HEAD Werkzeug закрывает ответ, ни разу не запустив генератор
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    response.call_on_close(release)
+    return response
+
+def skip_notes_cache():
+    """Кэшируем только полный список: страницы и NDJSON идут мимо кэша"""
+    return wants_ndjson() or bool(request.args)
+
+def is_cacheable(rv):
+    """Кэшируем только успешные ответы (ошибки возвращаются кортежем со статусом)"""
+    return not isinstance(rv, tuple)
+
+# Поколение кэша списков: входит в ключ, каждое изменение задает новое.
+# GET, начавшийся до записи, сохранит ответ под старым ключом, который уже
+# никто не прочитает - удаление ключей такую гонку не закрывает
+NOTES_CACHE_GEN_KEY = 'notes_cache_gen'
+
+def invalidate_notes_cache():
+    """Сбрасывает закэшированные списки заметок и статистику после изменений"""
+    generation = time.time_ns()
+    try:
+        cache.set(NOTES_CACHE_GEN_KEY, generation, timeout=0)  # Без истечения
+    except Exception as e:
+        # Запись в БД уже прошла - не превращаем ее в 500 из-за кэша
+        logger.error("❌ Cache invalidation error: %s", e)
+    return generation
+
+def notes_cache_key():
+    """Ключ кэша /api/notes и /api/stats с текущим поколением"""
+    generation = cache.get(NOTES_CACHE_GEN_KEY)
+    if generation is None:
+        # Поколение вытеснено или еще не задано - начинаем новое
+        generation = invalidate_notes_cache()
+    return f"view/{request.path}/{generation}"
+
+# Индексы таблицы notes: добавляются и в уже существующую таблицу
+# (MySQL 8 не поддерживает CREATE INDEX IF NOT EXISTS)
+NOTES_INDEXES = [
+    # Список активных заметок: WHERE is_deleted = FALSE ORDER BY created_at DESC
+    'CREATE INDEX idx_notes_active_created ON notes (is_deleted, created_at DESC, id DESC)',
+    # Полнотекстовый поиск: MATCH(title, content) AGAINST (...)
+    'ALTER TABLE notes ADD FULLTEXT INDEX ft_notes (title, content)',
+]
+
+# Максимум результатов поиска за один запрос
+SEARCH_LIMIT = 200
+# Максимум заметок в одном запросе POST /api/notes/bulk
+BULK_LIMIT = 1000
+
+# Потоковая выдача списков (по одной JSON-строке на заметку) для клиентов,
+# которые присылают Accept: application/x-ndjson
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Варианты UPDATE для update_note - фиксированный текст запроса вместо f-строки
+SQL_UPD_TITLE = 'UPDATE notes SET title = %s WHERE id = %s AND is_deleted = FALSE'
+SQL_UPD_CONTENT = 'UPDATE notes SET content = %s WHERE id = %s AND is_deleted = FALSE'
+SQL_UPD_BOTH = 'UPDATE notes SET title = %s, content = %s WHERE id = %s AND is_deleted = FALSE'
+
+# Keyset-пагинация списков: ?limit=50&before=<created_at>&before_id=<id>
+PAGE_SIZE = 50
+PAGE_MAX_SIZE = 200
+
+# Выборка активных заметок, условия дописывает build_notes_query()
+NOTES_SELECT_SQL = '''
+    SELECT id, title, content, created_at, updated_at 
+    FROM notes 
+    WHERE is_deleted = FALSE 
+'''
+
+def build_notes_query(search=None, before=None, before_id=None, limit=None):
+    """Собирает запрос списка заметок: поиск, курсор (created_at, id) и LIMIT"""
+    sql = [NOTES_SELECT_SQL]
+    params = []
+    if search is not None:
+        sql.append('AND MATCH(title, content) AGAINST (%s IN NATURAL LANGUAGE MODE)')
+        params.append(search)
+    if before is not None:
+        if before_id is None:
+            sql.append('AND created_at < %s')
+            params.append(before)
+        else:
+            # Заметки с одинаковым created_at (например, из /bulk) различаем по id
+            sql.append('AND (created_at < %s OR (created_at = %s AND id < %s))')
+            params.extend([before, before, before_id])
+    # Порядок совпадает с индексом idx_notes_active_created
+    sql.append('ORDER BY created_at DESC, id DESC')
+    if limit is not None:
+        sql.append('LIMIT %s')
+        params.append(limit)
+    return '\n'.join(sql), tuple(params)
 
 def init_database():
     """Инициализирует таблицы в базе данных"""
-    connection = get_db_connection()
+    # Одно прямое подключение: для DDL пул из DB_POOL_SIZE подключений не нужен
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except mysql.connector.Error as e:
+        logger.error("❌ Database connection error: %s", e)
+        connection = None
     if connection:
         try:
-            cursor = connection.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notes (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    title VARCHAR(255) NOT NULL,
-                    content TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    is_deleted BOOLEAN DEFAULT FALSE
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            ''')
-            connection.commit()
-            cursor.close()
-            connection.close()
+            with connection, connection.cursor() as cursor:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS notes (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        title VARCHAR(255) NOT NULL,
+                        content TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                        is_deleted BOOLEAN DEFAULT FALSE
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                ''')
+                for index_sql in NOTES_INDEXES:
+                    try:
+                        cursor.execute(index_sql)
+                    except mysql.connector.Error as e:
+                        if e.errno != errorcode.ER_DUP_KEYNAME:  # Индекс уже есть
+                            raise
             logger.info("✅ Database tables initialized")
+            return True
         except Exception as e:
-            logger.error(f"❌ Database initialization error: {e}")
+            logger.error("❌ Database initialization error: %s", e)
     else:
         logger.warning("⚠️ Skipping database initialization - connection failed")
+    return False
 
-# Инициализируем БД при запуске
-init_database()
+# Инициализация БД - отдельной командой (flask --app app init-db), а не при
+# импорте: иначе каждый воркер gunicorn выполняет DDL при старте
+@app.cli.command("init-db")
+def init_db_command():
+    """Создает таблицы и индексы в базе данных"""
+    if not init_database():
+        raise SystemExit(1)
 
 # ========== CRUD ОПЕРАЦИИ ДЛЯ БАЗЫ ДАННЫХ ==========
 
+# Постоянная часть ответа главной страницы - собирается один раз при импорте
+_INDEX_STATIC = {
+    "message": "✅ Cloud Notes API работает с Docker MySQL!",
+    "version": "1.0",
+    "status": "operational",
+    "storage": "MySQL in Docker",
+    "database_host": DB_CONFIG['host'],
+    "database_port": DB_CONFIG['port'],
+    "endpoints": {
+        "GET /health": "Проверка здоровья",
+        "GET /api/notes": "Получить все заметки (?limit=&before=&before_id= - постранично)",
+        "POST /api/notes": "Создать заметку",
+        "POST /api/notes/bulk": "Создать несколько заметок",
+        "GET /api/notes/<id>": "Получить заметку по ID",
+        "PUT /api/notes/<id>": "Обновить заметку",
+        "DELETE /api/notes/<id>": "Удалить заметку",
+        "POST /api/notes/<id>/restore": "Восстановить заметку"
+    }
+}
+
 @app.route('/')
+@cache.cached(timeout=DB_STATUS_TTL)
 def index():
     """Главная страница API"""
-    db_status = "connected" if get_db_connection() else "disconnected"
-    
-    return jsonify({
-        "message": "✅ Cloud Notes API работает с Docker MySQL!",
-        "version": "1.0",
-        "status": "operational",
-        "storage": "MySQL in Docker",
-        "database_status": db_status,
-        "database_host": DB_CONFIG['host'],
-        "database_port": DB_CONFIG['port'],
-        "endpoints": {
-            "GET /health": "Проверка здоровья",
-            "GET /api/notes": "Получить все заметки",
-            "POST /api/notes": "Создать заметку",
-            "GET /api/notes/<id>": "Получить заметку по ID",
-            "PUT /api/notes/<id>": "Обновить заметку",
-            "DELETE /api/notes/<id>": "Удалить заметку",
-            "POST /api/notes/<id>/restore": "Восстановить заметку"
-        }
-    })
+    return jsonify({**_INDEX_STATIC, "database_status": get_db_status()})
 
 @app.route('/health', methods=['GET'])
 def health():
     """Проверка здоровья приложения"""
-    db_status = "connected" if get_db_connection() else "disconnected"
+    db_status = get_db_status()
     
     return jsonify({
         "status": "healthy" if db_status == "connected" else "degraded",
@@ -114,10 +407,11 @@ def health():
 def create_note():
     """Создание новой заметки В БАЗЕ ДАННЫХ"""
     try:
-        data = request.json
+        # silent=True: битый JSON или чужой Content-Type дают None -> 400 ниже
+        data = request.get_json(silent=True)
         
         # Валидация
-        if not data:
+        if not isinstance(data, dict) or not data:
             return jsonify({"error": "Request body is required"}), 400
             
         title = data.get('title', '').strip()
@@ -131,82 +425,145 @@ def create_note():
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor()
-        
-        # Вставляем запись в БД
-        cursor.execute('''
-            INSERT INTO notes (title, content) 
-            VALUES (%s, %s)
-        ''', (title, content))
+        # TIMESTAMP хранит секунды - отбрасываем микросекунды, чтобы ответ
+        # совпадал с записью в БД без повторного SELECT
+        now = datetime.utcnow().replace(microsecond=0)
         
-        note_id = cursor.lastrowid
-        conn.commit()
-        
-        # Получаем созданную запись
-        cursor.execute('SELECT * FROM notes WHERE id = %s', (note_id,))
-        result = cursor.fetchone()
+        with conn, conn.cursor() as cursor:
+            # Вставляем запись в БД
+            cursor.execute('''
+                INSERT INTO notes (title, content, created_at, updated_at) 
+                VALUES (%s, %s, %s, %s)
+            ''', (title, content, now, now))
+            
+            note_id = cursor.lastrowid
         
-        cursor.close()
-        conn.close()
+        invalidate_notes_cache()
         
-        logger.info(f"✅ CREATE: Note #{note_id} created in database: '{title}'")
+        logger.info("✅ CREATE: Note #%d created in database: '%s'", note_id, title)
         
         # Форматируем ответ
         return jsonify({
-            "id": result[0],
-            "title": result[1],
-            "content": result[2] or "",
-            "created_at": result[3].isoformat() if result[3] else None,
-            "updated_at": result[4].isoformat() if result[4] else None,
-            "is_deleted": bool(result[5]),
+            "id": note_id,
+            "title": title,
+            "content": content,
+            "created_at": now,
+            "updated_at": now,
+            "is_deleted": False,
             "message": "Заметка успешно создана в базе данных"
         }), 201
         
     except Exception as e:
-        logger.error(f"❌ CREATE error: {e}")
+        logger.error("❌ CREATE error: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+# ---------- BULK CREATE ----------
+@app.route('/api/notes/bulk', methods=['POST'])
+def create_notes_bulk():
+    """Пакетное создание заметок В БАЗЕ ДАННЫХ одной транзакцией"""
+    try:
+        # silent=True: битый JSON или чужой Content-Type дают None -> 400 ниже
+        data = request.get_json(silent=True)
+        
+        # Валидация
+        if not isinstance(data, dict) or not isinstance(data.get('notes'), list):
+            return jsonify({"error": "Request body must contain a 'notes' list"}), 400
+        
+        notes = data['notes']
+        if not notes:
+            return jsonify({"error": "Notes list cannot be empty"}), 400
+        if len(notes) > BULK_LIMIT:
+            return jsonify({"error": f"No more than {BULK_LIMIT} notes per request"}), 400
+        
+        now = datetime.utcnow().replace(microsecond=0)
+        rows = []
+        for i, note in enumerate(notes):
+            if not isinstance(note, dict):
+                return jsonify({"error": f"Note #{i}: must be an object"}), 400
+            
+            title = note.get('title')
+            title = title.strip() if isinstance(title, str) else ''
+            if not title:
+                return jsonify({"error": f"Note #{i}: title is required and cannot be empty"}), 400
+            
+            content = note.get('content')
+            if content is not None and not isinstance(content, str):
+                return jsonify({"error": f"Note #{i}: content must be a string"}), 400
+            
+            rows.append((title, (content or '').strip(), now, now))
+        
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Database connection failed"}), 500
+        
+        with conn, conn.cursor() as cursor:
+            # Пакет - явной транзакцией; после commit() autocommit снова действует
+            conn.start_transaction()
+            try:
+                # executemany собирает один многострочный INSERT - один round-trip
+                cursor.executemany('''
+                    INSERT INTO notes (title, content, created_at, updated_at) 
+                    VALUES (%s, %s, %s, %s)
+                ''', rows)
+                conn.commit()
+            except Exception:
+                # Не возвращаем в пул подключение с открытой транзакцией
+                conn.rollback()
+                raise
+        
+        invalidate_notes_cache()
+        
+        logger.info("✅ BULK CREATE: %d notes created in database", len(rows))
+        
+        return jsonify({
+            "count": len(rows),
+            "message": f"Создано {len(rows)} заметок в базе данных"
+        }), 201
+        
+    except Exception as e:
+        logger.error("❌ BULK CREATE error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 # ---------- READ ALL ----------
 @app.route('/api/notes', methods=['GET'])
+@cache.cached(timeout=30, key_prefix=notes_cache_key, unless=skip_notes_cache, response_filter=is_cacheable)
 def get_all_notes():
     """Получение всех заметок ИЗ БАЗЫ ДАННЫХ"""
     try:
+        # Без параметров отдаем весь список, как раньше; страница - по ?limit/?before
+        try:
+            limit, before, before_id = parse_page_args(None, PAGE_MAX_SIZE)
+        except ValueError:
+            return jsonify({"error": f"Invalid pagination: limit (1-{PAGE_MAX_SIZE}), before (ISO datetime), before_id"}), 400
+        if before is not None and limit is None:
+            limit = PAGE_SIZE
+        sql, params = build_notes_query(before=before, before_id=before_id, limit=limit)
+        
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor(dictionary=True)  # Возвращает словари
-        
-        cursor.execute('''
-            SELECT id, title, content, created_at, updated_at 
-            FROM notes 
-            WHERE is_deleted = FALSE 
-            ORDER BY created_at DESC
-        ''')
+        if wants_ndjson():
+            return stream_ndjson(conn, sql, params, is_deleted=False)
         
-        notes = cursor.fetchall()
+        with conn, conn.cursor(dictionary=True) as cursor:  # Возвращает словари
+            cursor.execute(sql, params)
+            notes = cursor.fetchall()
         
-        # Преобразуем datetime в строки
         for note in notes:
-            if note['created_at']:
-                note['created_at'] = note['created_at'].isoformat()
-            if note['updated_at']:
-                note['updated_at'] = note['updated_at'].isoformat()
             note['is_deleted'] = False  # Все записи уже отфильтрованы
         
-        cursor.close()
-        conn.close()
-        
-        logger.info(f"✅ READ ALL: Retrieved {len(notes)} notes from database")
+        logger.info("✅ READ ALL: Retrieved %d notes from database", len(notes))
         
         return jsonify({
             "notes": notes,
             "count": len(notes),
+            "next_cursor": get_next_cursor(notes, limit),
             "message": f"Найдено {len(notes)} заметок в базе данных"
         })
         
     except Exception as e:
-        logger.error(f"❌ READ ALL error: {e}")
+        logger.error("❌ READ ALL error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 # ---------- READ ONE ----------
@@ -218,40 +575,34 @@ def get_note(note_id):
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute('''
-            SELECT id, title, content, created_at, updated_at, is_deleted 
-            FROM notes 
-            WHERE id = %s
-        ''', (note_id,))
-        
-        note = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
+        # Обычный курсор: без построения словаря на каждую строку
+        with conn, conn.cursor() as cursor:
+            cursor.execute('''
+                SELECT title, content, created_at, updated_at, is_deleted 
+                FROM notes 
+                WHERE id = %s
+            ''', (note_id,))
+            
+            row = cursor.fetchone()
         
-        if not note:
+        if not row:
             return jsonify({"error": f"Заметка с ID {note_id} не найдена"}), 404
         
-        if note['is_deleted']:
+        if row[4]:  # is_deleted = True
             return jsonify({"error": f"Заметка с ID {note_id} была удалена"}), 404
         
-        # Преобразуем datetime
-        if note['created_at']:
-            note['created_at'] = note['created_at'].isoformat()
-        if note['updated_at']:
-            note['updated_at'] = note['updated_at'].isoformat()
-        
-        # Убираем is_deleted из ответа
-        del note['is_deleted']
-        
-        logger.info(f"✅ READ ONE: Retrieved note #{note_id} from database")
+        logger.info("✅ READ ONE: Retrieved note #%d from database", note_id)
         
-        return jsonify(note)
+        return jsonify({
+            "id": note_id,
+            "title": row[0],
+            "content": row[1] or "",
+            "created_at": row[2],
+            "updated_at": row[3]
+        })
         
     except Exception as e:
-        logger.error(f"❌ READ ONE error: {e}")
+        logger.error("❌ READ ONE error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 # ---------- UPDATE ----------
@@ -259,66 +610,63 @@ def get_note(note_id):
 def update_note(note_id):
     """Обновление существующей заметки В БАЗЕ ДАННЫХ"""
     try:
-        data = request.json
+        data = request.get_json(silent=True)
         
-        if not data:
+        if not isinstance(data, dict) or not data:
             return jsonify({"error": "Request body is required"}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({"error": "Database connection failed"}), 500
-            
-        cursor = conn.cursor()
-        
-        # Проверяем существование и не удалена ли заметка
-        cursor.execute('SELECT is_deleted FROM notes WHERE id = %s', (note_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            cursor.close()
-            conn.close()
-            return jsonify({"error": f"Заметка с ID {note_id} не найдена"}), 404
-        
-        if result[0]:  # is_deleted = True
-            cursor.close()
-            conn.close()
-            return jsonify({"error": f"Нельзя обновить удаленную заметку"}), 400
-        
         # Подготавливаем данные для обновления
-        updates = []
-        values = []
+        title = None
+        content = None
         
         if 'title' in data:
             title = data['title'].strip()
-            if title:
-                updates.append("title = %s")
-                values.append(title)
-            elif title == "":
-                cursor.close()
-                conn.close()
+            if title == "":
                 return jsonify({"error": "Title cannot be empty"}), 400
                 
         if 'content' in data:
-            updates.append("content = %s")
-            values.append(data['content'].strip())
-        
-        if not updates:
-            cursor.close()
-            conn.close()
-            return jsonify({"message": "No changes detected"})
+            content = data['content'].strip()
+        
+        # Выбираем готовый шаблон UPDATE
+        if title is not None and content is not None:
+            update_query, values = SQL_UPD_BOTH, (title, content, note_id)
+        elif title is not None:
+            update_query, values = SQL_UPD_TITLE, (title, note_id)
+        elif content is not None:
+            update_query, values = SQL_UPD_CONTENT, (content, note_id)
+        else:
+            update_query, values = None, None  # Менять нечего, но заметку проверяем
         
-        # Добавляем ID в конец значений
-        values.append(note_id)
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({"error": "Database connection failed"}), 500
+            
+        with conn, conn.cursor() as cursor:
+            rows_affected = 0
+            if update_query:
+                # Обновляем только не удаленную заметку - проверка и запись одним запросом
+                cursor.execute(update_query, values)
+                rows_affected = cursor.rowcount
+            
+            if rows_affected == 0:
+                # Выясняем причину только в редком случае: нет заметки, она
+                # удалена, значения не изменились (MySQL не считает такую
+                # строку) или в запросе нет полей для обновления
+                cursor.execute('SELECT is_deleted FROM notes WHERE id = %s', (note_id,))
+                result = cursor.fetchone()
+                
+                if not result:
+                    return jsonify({"error": f"Заметка с ID {note_id} не найдена"}), 404
+                
+                if result[0]:  # is_deleted = True
+                    return jsonify({"error": f"Нельзя обновить удаленную заметку"}), 400
         
-        # Выполняем обновление
-        update_query = f"UPDATE notes SET {', '.join(updates)} WHERE id = %s"
-        cursor.execute(update_query, values)
+        if not update_query:
+            return jsonify({"message": "No changes detected"})
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        invalidate_notes_cache()
         
-        logger.info(f"✅ UPDATE: Note #{note_id} updated in database")
+        logger.info("✅ UPDATE: Note #%d updated in database", note_id)
         
         return jsonify({
             "id": note_id,
@@ -326,7 +674,7 @@ def update_note(note_id):
         })
         
     except Exception as e:
-        logger.error(f"❌ UPDATE error: {e}")
+        logger.error("❌ UPDATE error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 # ---------- DELETE ----------
@@ -338,25 +686,22 @@ def delete_note(note_id):
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor()
-        
-        # Используем мягкое удаление (is_deleted = TRUE)
-        cursor.execute('''
-            UPDATE notes 
-            SET is_deleted = TRUE 
-            WHERE id = %s AND is_deleted = FALSE
-        ''', (note_id,))
-        
-        rows_affected = cursor.rowcount
-        conn.commit()
-        
-        cursor.close()
-        conn.close()
+        with conn, conn.cursor() as cursor:
+            # Используем мягкое удаление (is_deleted = TRUE)
+            cursor.execute('''
+                UPDATE notes 
+                SET is_deleted = TRUE 
+                WHERE id = %s AND is_deleted = FALSE
+            ''', (note_id,))
+            
+            rows_affected = cursor.rowcount
         
         if rows_affected == 0:
             return jsonify({"error": "Заметка не найдена или уже удалена"}), 404
         
-        logger.info(f"✅ DELETE: Note #{note_id} soft-deleted from database")
+        invalidate_notes_cache()
+        
+        logger.info("✅ DELETE: Note #%d soft-deleted from database", note_id)
         
         return jsonify({
             "id": note_id,
@@ -364,7 +709,7 @@ def delete_note(note_id):
         })
         
     except Exception as e:
-        logger.error(f"❌ DELETE error: {e}")
+        logger.error("❌ DELETE error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 # ---------- RESTORE ----------
@@ -376,24 +721,21 @@ def restore_note(note_id):
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE notes 
-            SET is_deleted = FALSE 
-            WHERE id = %s AND is_deleted = TRUE
-        ''', (note_id,))
-        
-        rows_affected = cursor.rowcount
-        conn.commit()
-        
-        cursor.close()
-        conn.close()
+        with conn, conn.cursor() as cursor:
+            cursor.execute('''
+                UPDATE notes 
+                SET is_deleted = FALSE 
+                WHERE id = %s AND is_deleted = TRUE
+            ''', (note_id,))
+            
+            rows_affected = cursor.rowcount
         
         if rows_affected == 0:
             return jsonify({"error": "Заметка не найдена или не была удалена"}), 404
         
-        logger.info(f"✅ RESTORE: Note #{note_id} restored in database")
+        invalidate_notes_cache()
+        
+        logger.info("✅ RESTORE: Note #%d restored in database", note_id)
         
         return jsonify({
             "id": note_id,
@@ -401,12 +743,13 @@ def restore_note(note_id):
         })
         
     except Exception as e:
-        logger.error(f"❌ RESTORE error: {e}")
+        logger.error("❌ RESTORE error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 # ========== ДОПОЛНИТЕЛЬНЫЕ ЭНДПОИНТЫ ==========
 
 @app.route('/api/stats', methods=['GET'])
+@cache.cached(timeout=60, key_prefix=notes_cache_key, response_filter=is_cacheable)
 def get_stats():
     """Статистика по заметкам ИЗ БАЗЫ ДАННЫХ"""
     try:
@@ -414,38 +757,32 @@ def get_stats():
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor()
-        
-        # Общее количество
-        cursor.execute('SELECT COUNT(*) FROM notes')
-        total = cursor.fetchone()[0]
-        
-        # Активные заметки
-        cursor.execute('SELECT COUNT(*) FROM notes WHERE is_deleted = FALSE')
-        active = cursor.fetchone()[0]
+        with conn, conn.cursor() as cursor:
+            # Общее количество, активные заметки и ID первой/последней заметки
+            # одним проходом по таблице (COUNT(CASE ...) дает int, а не Decimal)
+            cursor.execute('''
+                SELECT COUNT(*),
+                       COUNT(CASE WHEN is_deleted = FALSE THEN 1 END),
+                       MIN(id), MAX(id)
+                FROM notes
+            ''')
+            total, active, first_id, last_id = cursor.fetchone()
         
         # Удаленные заметки
         deleted = total - active
         
-        # ID первой и последней заметки
-        cursor.execute('SELECT MIN(id), MAX(id) FROM notes')
-        min_max = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
         return jsonify({
             "total_notes": total,
             "active_notes": active,
             "deleted_notes": deleted,
             "storage_type": "MySQL in Docker",
             "database_host": DB_CONFIG['host'],
-            "first_note_id": min_max[0],
-            "last_note_id": min_max[1]
+            "first_note_id": first_id,
+            "last_note_id": last_id
         })
         
     except Exception as e:
-        logger.error(f"❌ STATS error: {e}")
+        logger.error("❌ STATS error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/search', methods=['GET'])
@@ -457,43 +794,34 @@ def search_notes():
         if not query:
             return jsonify({"error": "Search query is required"}), 400
         
+        try:
+            limit, before, before_id = parse_page_args(SEARCH_LIMIT, SEARCH_LIMIT)
+        except ValueError:
+            return jsonify({"error": f"Invalid pagination: limit (1-{SEARCH_LIMIT}), before (ISO datetime), before_id"}), 400
+        sql, params = build_notes_query(query, before, before_id, limit)
+        
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
             
-        cursor = conn.cursor(dictionary=True)
-        
-        search_query = f"%{query}%"
-        cursor.execute('''
-            SELECT id, title, content, created_at, updated_at 
-            FROM notes 
-            WHERE is_deleted = FALSE 
-            AND (title LIKE %s OR content LIKE %s)
-            ORDER BY created_at DESC
-        ''', (search_query, search_query))
-        
-        results = cursor.fetchall()
-        
-        # Преобразуем datetime в строки
-        for note in results:
-            if note['created_at']:
-                note['created_at'] = note['created_at'].isoformat()
-            if note['updated_at']:
-                note['updated_at'] = note['updated_at'].isoformat()
+        if wants_ndjson():
+            return stream_ndjson(conn, sql, params)
         
-        cursor.close()
-        conn.close()
+        with conn, conn.cursor(dictionary=True) as cursor:
+            cursor.execute(sql, params)
+            results = cursor.fetchall()
         
-        logger.info(f"🔍 SEARCH: Found {len(results)} notes for query '{query}'")
+        logger.info("🔍 SEARCH: Found %d notes for query '%s'", len(results), query)
         
         return jsonify({
             "query": query,
             "results": results,
-            "count": len(results)
+            "count": len(results),
+            "next_cursor": get_next_cursor(results, limit)
         })
         
     except Exception as e:
-        logger.error(f"❌ SEARCH error: {e}")
+        logger.error("❌ SEARCH error: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == '__main__':
@@ -507,6 +835,7 @@ if __name__ == '__main__':
     print("  GET  /                    - Информация об API")
     print("  GET  /health              - Проверка здоровья")
     print("  POST /api/notes           - Создать заметку")
+    print("  POST /api/notes/bulk      - Создать несколько заметок")
     print("  GET  /api/notes           - Все заметки")
     print("  GET  /api/notes/<id>      - Получить заметку")
     print("  PUT  /api/notes/<id>      - Обновить заметку")
@@ -516,4 +845,5 @@ if __name__ == '__main__':
     print("  GET  /api/search?q=текст  - Поиск")
     print("\n" + "=" * 60)
     
+    init_database()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
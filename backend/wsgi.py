@@ -0,0 +1,8 @@
+# Точка входа для gunicorn с gevent-воркерами:
+#   gunicorn -k gevent -w 4 --worker-connections 1000 -b 0.0.0.0:5000 wsgi:app
+# monkey.patch_all() должен выполниться до импорта app, чтобы ожидание MySQL
+# отдавало управление другим запросам
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402
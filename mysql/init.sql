@@ -9,8 +9,9 @@ CREATE TABLE IF NOT EXISTS notes (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     is_deleted BOOLEAN DEFAULT FALSE,
-    INDEX idx_deleted (is_deleted),
-    INDEX idx_created (created_at)
+    INDEX idx_notes_active_created (is_deleted, created_at DESC, id DESC),
+    INDEX idx_created (created_at),
+    FULLTEXT INDEX ft_notes (title, content)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Создаем таблицу для аудита (опционально)